@@ -10,6 +10,7 @@ import os
 import sys
 import subprocess
 import io
+import importlib
 
 
 def _run_script(script_name):
@@ -80,6 +81,20 @@ def _run_script(script_name):
     return result
 
 
+def _import_impl(module_name, func_name):
+    """
+    Import func_name from the gmns_ready.<module_name> submodule.
+
+    Loading a submodule binds it over the package attribute of the same name,
+    which would replace wrappers such as gr.build_network after their first
+    call; the wrapper is put back so repeated gr.<name>() calls keep working.
+    """
+    module = importlib.import_module('.' + module_name, __name__)
+    if module_name in _WRAPPERS:
+        globals()[module_name] = _WRAPPERS[module_name]
+    return getattr(module, func_name)
+
+
 def extract_zones():
     """
     Extract zone centroids and boundaries from shapefile.
@@ -143,7 +158,7 @@ def clean_network():
 
 
 def build_network(zone_search_radius=1000, link_df=None, node_df=None, node_taz_df=None,
-                  input_path=None, output_path=None):
+                  input_path=None, output_path=None, fast_io=False):
     """
     Generate zone-connected network with connectors.
 
@@ -175,6 +190,15 @@ def build_network(zone_search_radius=1000, link_df=None, node_df=None, node_taz_
     output_path : str, optional
         Path for output files. Default is current_dir/connected_network
 
+    fast_io : bool, default=False
+        Read and write CSV files with pyarrow's multithreaded engine; link.csv
+        files over 50 MB are read with pyogrio, which also parses the geometry.
+        Parsed input links are cached in connected_network/link_source_cache.parquet
+        and reused while link.csv keeps the same path, size and modification time.
+        Requires pip install gmns-ready[fast]; falls back to pandas otherwise.
+        Output files hold the same values as the pandas writer, but string
+        values are quoted and whole-number floats lose their ".0" (90, not 90.0).
+
     Outputs:
         - connected_network/ folder with:
           - node.csv (network + zones + activity nodes)
@@ -200,6 +224,9 @@ def build_network(zone_search_radius=1000, link_df=None, node_df=None, node_taz_
     >>> # Unlimited search (always find nearest link)
     >>> gr.build_network(zone_search_radius=None)
 
+    >>> # Multithreaded CSV I/O for large networks (requires pyarrow)
+    >>> gr.build_network(fast_io=True)
+
     >>> # With dataframes (for programmatic use)
     >>> link_df, node_df, connector_df = gr.build_network(
     ...     zone_search_radius=1000,
@@ -208,9 +235,9 @@ def build_network(zone_search_radius=1000, link_df=None, node_df=None, node_taz_
     ...     node_taz_df=zone_df
     ... )
     """
-    from .build_network import build_network as _build_network
+    _build_network = _import_impl('build_network', 'build_network')
     return _build_network(zone_search_radius, link_df, node_df, node_taz_df,
-                          input_path, output_path)
+                          input_path, output_path, fast_io)
 
 
 def validate_basemap():
@@ -290,14 +317,16 @@ def validate_assignment():
     >>> import gmns_ready as gr
     >>> gr.validate_assignment()
     """
-    from .validate_assignment import run_validation
+    run_validation = _import_impl('validate_assignment', 'run_validation')
     success = run_validation()
     if not success:
         raise RuntimeError("Assignment validation failed. Check the report for details.")
 
 
 def enhance_connectors(search_radius=1000, accessibility_threshold=0.10,
-                       min_connectors=6, input_path=None, output_path=None):
+                       min_connectors=6, input_path=None, output_path=None,
+                       use_geodesic=False, fast_io=False, link_df=None, node_df=None,
+                       accessibility_df=None, spatial_index=None):
     """
     Add connectors for poorly connected zones.
 
@@ -327,6 +356,29 @@ def enhance_connectors(search_radius=1000, accessibility_threshold=0.10,
     output_path : str, optional
         Output directory for enhanced files. Default is input_path/connected_network.
 
+    use_geodesic : bool, default=False
+        Use geopy's geodesic distance instead of the fast vectorized
+        great-circle distance. Requires geopy.
+
+    fast_io : bool, default=False
+        Read inputs and write link_enhanced.csv with pyarrow's multithreaded CSV reader/writer.
+        The output holds the same values, but string values are quoted and
+        whole-number floats lose their ".0" (90, not 90.0).
+        Install with: pip install gmns-ready[fast]
+
+    link_df : pd.DataFrame, optional
+        Link dataframe (e.g. from build_network). If None, reads connected_network/link.csv
+
+    node_df : pd.DataFrame, optional
+        Node dataframe (e.g. from build_network). If None, reads connected_network/node.csv
+
+    accessibility_df : pd.DataFrame, optional
+        Zone accessibility dataframe. If None, reads connected_network/zone_accessibility.csv
+
+    spatial_index : dict, optional
+        KD-tree cache from a previous call (report_dict['spatial_index']) on
+        the same node_df. Its trees are reused instead of being rebuilt.
+
     Outputs:
         - connected_network/link_updated.csv (enhanced link file)
         - connected_network/connector_editor_report.txt (enhancement details)
@@ -353,11 +405,28 @@ def enhance_connectors(search_radius=1000, accessibility_threshold=0.10,
     ...     accessibility_threshold=0.15,
     ...     min_connectors=8
     ... )
+
+    >>> # Reuse build_network results and the KD-trees across runs
+    >>> link_df, node_df, _ = gr.build_network()
+    >>> enhanced_df, report = gr.enhance_connectors(link_df=link_df, node_df=node_df)
+    >>> enhanced_df, report = gr.enhance_connectors(
+    ...     search_radius=1500, link_df=link_df, node_df=node_df,
+    ...     spatial_index=report['spatial_index']
+    ... )
     """
-    from .enhance_connectors import enhance_connectors as _enhance_connectors
+    _enhance_connectors = _import_impl('enhance_connectors', 'enhance_connectors')
     return _enhance_connectors(search_radius, accessibility_threshold,
-                               min_connectors, input_path, output_path)
+                               min_connectors, input_path, output_path,
+                               use_geodesic, fast_io, link_df, node_df,
+                               accessibility_df, spatial_index)
+
 
+# Wrappers that share a name with their submodule (restored by _import_impl)
+_WRAPPERS = {
+    'build_network': build_network,
+    'validate_assignment': validate_assignment,
+    'enhance_connectors': enhance_connectors,
+}
 
 # Public API
 __all__ = [
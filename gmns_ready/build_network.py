@@ -7,15 +7,127 @@ Zones without activities connect to lower-level network links
 """
 import pandas as pd
 import numpy as np
-from geopy.distance import geodesic
 import time
 import os
-from shapely import wkt
-from shapely.geometry import Point, box
+import json
+import shapely
 import geopandas as gpd
+from scipy.spatial import cKDTree
 
+try:
+    from .common import (KDTREE_WORKERS, M_TO_MI, chord_radius_m, ecef_xyz, haversine_m,
+                         load_csv, save_csv)
+except ImportError:  # Run as a script from the package directory
+    from common import (KDTREE_WORKERS, M_TO_MI, chord_radius_m, ecef_xyz, haversine_m,
+                        load_csv, save_csv)
 
-def process_node_data(node_df, node_taz_df, output_path):
+
+LARGE_CSV_BYTES = 50 * 1024 ** 2  # link.csv size above which fast_io reads via pyogrio
+LINK_CACHE_FILE = "link_source_cache.parquet"  # fast_io cache of parsed input links (in output_path)
+LINK_CACHE_KEY = b"gmns_ready_source"  # Parquet metadata key holding the source link.csv stamp
+KMH_TO_MPH = 1.0 / 1.60934  # km/h to mph
+
+
+def file_stamp(path):
+    """Identity of a file's current contents for cache checks: absolute path, size and mtime (ns)"""
+    stat = os.stat(path)
+    return json.dumps({"path": os.path.abspath(path), "size": stat.st_size,
+                       "mtime_ns": stat.st_mtime_ns}, sort_keys=True).encode()
+
+
+def read_link_cache(cache_path, stamp):
+    """Links from a cache written by write_link_cache, or None if it is missing, stale or unreadable"""
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        import pyarrow.parquet as pq
+        if (pq.read_schema(cache_path).metadata or {}).get(LINK_CACHE_KEY) != stamp:
+            return None
+        link_df = pq.read_table(cache_path).to_pandas()
+    except (ImportError, ValueError, OSError) as exc:
+        print(f"  [WARNING] Could not read {cache_path} ({exc}), reading link.csv")
+        return None
+    link_df["geometry"] = shapely.from_wkb(link_df["geometry"].to_numpy())
+    return gpd.GeoDataFrame(link_df, geometry="geometry", crs="EPSG:4326")
+
+
+def write_link_cache(link_df, cache_path, stamp):
+    """Write parsed links to Parquet (geometry as WKB) tagged with the source file stamp"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        frame = pd.DataFrame(link_df)
+        frame["geometry"] = shapely.to_wkb(link_df["geometry"].to_numpy())
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), LINK_CACHE_KEY: stamp})
+        pq.write_table(table, cache_path)
+    except (ImportError, ValueError, OSError) as exc:
+        print(f"  [WARNING] Could not write {cache_path} ({exc})")
+
+
+def load_link_csv(path, fast_io=False, cache_dir=None):
+    """
+    Read link.csv; with fast_io, large files are read by pyogrio (GDAL) with WKT parsed in C
+
+    With fast_io and a cache_dir, the parsed links are also cached in
+    cache_dir/link_source_cache.parquet (geometry stored as WKB). Later calls
+    read the cache while link.csv has the same path, size and modification
+    time, skipping CSV parsing and WKT conversion entirely.
+    """
+    if not fast_io:
+        return load_csv(path)
+    if cache_dir is not None:
+        cache_path = os.path.join(cache_dir, LINK_CACHE_FILE)
+        stamp = file_stamp(path)
+        link_df = read_link_cache(cache_path, stamp)
+        if link_df is not None:
+            print(f"  Read cached links from {cache_path}")
+            return link_df
+    link_df = None
+    if os.path.getsize(path) > LARGE_CSV_BYTES:
+        try:
+            import pyogrio
+        except ImportError:
+            print("  [WARNING] pyogrio not installed, reading link.csv without it")
+        else:
+            columns = pd.read_csv(path, nrows=0).columns
+            link_df = pyogrio.read_dataframe(path, GEOM_POSSIBLE_NAMES="geometry", KEEP_GEOM_COLUMNS="NO",
+                                             AUTODETECT_TYPE="YES", AUTODETECT_SIZE_LIMIT=0)
+            link_df = link_df[list(columns)].set_crs("EPSG:4326")
+    if link_df is None:
+        link_df = load_csv(path, fast_io)
+        link_df["geometry"] = shapely.from_wkt(link_df["geometry"].to_numpy())
+        link_df = gpd.GeoDataFrame(link_df, geometry="geometry", crs="EPSG:4326")
+    if cache_dir is not None:
+        write_link_cache(link_df, cache_path, stamp)
+    return link_df
+
+
+VDF_COLUMNS = ['vdf_toll', 'allowed_uses', 'vdf_alpha', 'vdf_beta', 'vdf_plf', 'vdf_length_mi',
+               'vdf_free_speed_mph', 'free_speed_in_mph_raw', 'vdf_fftt',
+               'ref_volume', 'base_volume', 'base_vol_auto', 'restricted_turn_nodes']
+
+
+def add_vdf_columns(link_df):
+    """Derive VDF columns in place from length (m) and free_speed (km/h)"""
+    length = link_df["length"].to_numpy(dtype=float)
+    free_speed = link_df["free_speed"].to_numpy(dtype=float)
+    
+    link_df["vdf_toll"] = 0
+    link_df["allowed_uses"] = None
+    link_df["vdf_alpha"] = 0.15
+    link_df["vdf_beta"] = 4
+    link_df["vdf_plf"] = 1
+    link_df["vdf_length_mi"] = np.round(length * M_TO_MI, 2)
+    link_df["vdf_free_speed_mph"] = np.round(free_speed * (KMH_TO_MPH / 5)) * 5
+    link_df["free_speed_in_mph_raw"] = link_df["vdf_free_speed_mph"]  # Already a multiple of 5
+    link_df["vdf_fftt"] = np.round(length / free_speed * 0.06, 2)
+    
+    for col in ['ref_volume', 'base_volume', 'base_vol_auto', 'restricted_turn_nodes']:
+        link_df[col] = None
+
+
+def process_node_data(node_df, node_taz_df, output_path, fast_io=False):
     """Add new_node_id and separate activity nodes"""
     print("\nProcessing node data...")
     max_taz_id = node_taz_df['node_id'].max()
@@ -28,7 +140,7 @@ def process_node_data(node_df, node_taz_df, output_path):
     print(f"  Activity nodes: {len(activity_node_df)}")
     print(f"  Regular nodes: {len(common_node_df)}")
     
-    activity_node_df.to_csv(os.path.join(output_path, "activity_node.csv"), index=False)
+    save_csv(activity_node_df, os.path.join(output_path, "activity_node.csv"), fast_io)
     return node_df, activity_node_df, common_node_df
 
 
@@ -36,9 +148,19 @@ def update_link_node_ids(link_df, node_df):
     """Update link node IDs with new_node_id mapping"""
     print("\nUpdating link node IDs...")
     updated_link = link_df.copy()
-    node_map = node_df.set_index('node_id')['new_node_id'].to_dict()
-    updated_link['from_node_id'] = updated_link['from_node_id'].map(node_map)
-    updated_link['to_node_id'] = updated_link['to_node_id'].map(node_map)
+    # Duplicate node_ids map to their last row, as a dict lookup would
+    lookup = node_df.drop_duplicates('node_id', keep='last')
+    if len(lookup) < len(node_df):
+        print(f"  Warning: {len(node_df) - len(lookup)} duplicate node_id rows; links use the last of each")
+    # Vectorized lookup: positions of link endpoints in node_id, then fancy-index new_node_id
+    node_index = pd.Index(lookup['node_id'].to_numpy())
+    new_ids = lookup['new_node_id'].to_numpy()
+    for col in ['from_node_id', 'to_node_id']:
+        pos = node_index.get_indexer(updated_link[col].to_numpy())
+        mapped = new_ids[pos]
+        if (pos < 0).any():
+            mapped = np.where(pos >= 0, mapped, np.nan)
+        updated_link[col] = mapped
     
     missing = updated_link[['from_node_id', 'to_node_id']].isnull().sum()
     if missing.any():
@@ -48,7 +170,7 @@ def update_link_node_ids(link_df, node_df):
 
 
 def generate_connectors(activity_node_df, node_taz_df, updated_link_df, updated_node_df, 
-                        zone_search_radius, output_path):
+                        zone_search_radius):
     """
     Generate bi-directional connector links
     - Activity nodes: Always connect to nearest zone
@@ -61,7 +183,6 @@ def generate_connectors(activity_node_df, node_taz_df, updated_link_df, updated_
         None = unlimited (always find nearest link)
         Recommended: 500, 1000, etc.
     """
-    connector_links = []
     zones_with_activities = set()
     
     print("\n" + "="*80)
@@ -80,17 +201,18 @@ def generate_connectors(activity_node_df, node_taz_df, updated_link_df, updated_
     if has_boundary:
         print("  - Using boundary-based matching")
         if node_taz_df["boundary_geometry"].dtype == object:
-            node_taz_df["boundary_geometry"] = node_taz_df["boundary_geometry"].apply(wkt.loads)
-        node_taz_df["boundary_geometry"] = node_taz_df["boundary_geometry"].apply(lambda g: g.buffer(0.0001))
+            node_taz_df["boundary_geometry"] = shapely.from_wkt(node_taz_df["boundary_geometry"].to_numpy())
+        # Prepared in place; reused by the activity and link boundary tests below
+        shapely.prepare(node_taz_df["boundary_geometry"].to_numpy())
     
     # Convert to GeoDataFrames (FIXED: Proper assignment)
     if node_taz_df["geometry"].dtype == object:
-        node_taz_df["geometry"] = node_taz_df["geometry"].apply(wkt.loads)
+        node_taz_df["geometry"] = shapely.from_wkt(node_taz_df["geometry"].to_numpy())
     if not isinstance(node_taz_df, gpd.GeoDataFrame):
         node_taz_df = gpd.GeoDataFrame(node_taz_df, geometry="geometry", crs="EPSG:4326")
     
     if updated_link_df["geometry"].dtype == object:
-        updated_link_df["geometry"] = updated_link_df["geometry"].apply(wkt.loads)
+        updated_link_df["geometry"] = shapely.from_wkt(updated_link_df["geometry"].to_numpy())
     if not isinstance(updated_link_df, gpd.GeoDataFrame):
         updated_link_df = gpd.GeoDataFrame(updated_link_df, geometry="geometry", crs="EPSG:4326")
     
@@ -99,8 +221,8 @@ def generate_connectors(activity_node_df, node_taz_df, updated_link_df, updated_
     print("STEP 1: Building spatial index...")
     print("="*80)
     link_sindex = updated_link_df.sindex
-    node_coords = {row["new_node_id"]: (row["x_coord"], row["y_coord"]) 
-                   for _, row in updated_node_df.iterrows()}
+    node_coords = dict(zip(updated_node_df["new_node_id"].to_numpy(),
+                           zip(updated_node_df["x_coord"].to_numpy(), updated_node_df["y_coord"].to_numpy())))
     
     # Determine lower-level link types (last two types)
     all_link_types = sorted(updated_link_df['link_type'].unique())
@@ -113,50 +235,37 @@ def generate_connectors(activity_node_df, node_taz_df, updated_link_df, updated_
     print("STEP 2: Connecting activity nodes to zones...")
     print("="*80)
     
-    for _, activity in activity_node_df.iterrows():
-        act_id = activity["new_node_id"]
-        act_point = Point(activity["x_coord"], activity["y_coord"])
-        
-        matched_zone = None
-        
-        # Try boundary matching first
-        if has_boundary:
-            for _, zone in node_taz_df.iterrows():
-                if zone["boundary_geometry"].contains(act_point):
-                    matched_zone = zone
-                    break
-        
-        # Find nearest zone if no boundary match
-        if matched_zone is None:
-            distances = node_taz_df.apply(
-                lambda z: geodesic((act_point.y, act_point.x), 
-                                  (z["geometry"].y, z["geometry"].x)).meters, axis=1)
-            matched_zone = node_taz_df.loc[distances.idxmin()]
-        
-        taz_id = matched_zone["node_id"]
-        taz_point = matched_zone["geometry"]
-        zones_with_activities.add(taz_id)
-        
-        # Create bi-directional connectors
-        for from_id, to_id, from_pt, to_pt in [
-            (taz_id, act_id, taz_point, act_point),
-            (act_id, taz_id, act_point, taz_point)
-        ]:
-            connector_links.append({
-                "link_id": len(connector_links) + 1,
-                "from_node_id": from_id,
-                "to_node_id": to_id,
-                "dir_flag": 1,
-                "length": round(geodesic((from_pt.y, from_pt.x), (to_pt.y, to_pt.x)).meters, 2),
-                "lanes": 1,
-                "free_speed": 90,
-                "capacity": 99999,
-                "link_type_name": "connector",
-                "link_type": 0,
-                "geometry": f"LINESTRING ({from_pt.x} {from_pt.y}, {to_pt.x} {to_pt.y})",
-                "from_biway": 1,
-                "is_link": 0
-            })
+    act_ids = activity_node_df["new_node_id"].to_numpy()
+    act_x = activity_node_df["x_coord"].to_numpy(dtype=float)
+    act_y = activity_node_df["y_coord"].to_numpy(dtype=float)
+    zone_x = node_taz_df.geometry.x.to_numpy()
+    zone_y = node_taz_df.geometry.y.to_numpy()
+    matched_idx = np.full(len(activity_node_df), -1, dtype=np.int64)
+    
+    # Try boundary matching first
+    if has_boundary:
+        boundaries = node_taz_df["boundary_geometry"].to_numpy()
+        # STRtree envelope query for candidates, then an exact point-in-polygon test on raw
+        # coordinates (intersects_xy counts points on the boundary edge as inside)
+        act_pos, zone_pos = shapely.STRtree(boundaries).query(shapely.points(act_x, act_y))
+        inside = shapely.intersects_xy(boundaries[zone_pos], act_x[act_pos], act_y[act_pos])
+        act_pos, zone_pos = act_pos[inside], zone_pos[inside]
+        # Activities inside overlapping boundaries keep the first zone
+        order = np.lexsort((zone_pos, act_pos))
+        _, first = np.unique(act_pos[order], return_index=True)
+        matched_idx[act_pos[order][first]] = zone_pos[order][first]
+    
+    # Find nearest zone if no boundary match (one KD-tree query for all activities). KD-trees
+    # here work on Earth-centered coordinates: the nearest point by chord length is the
+    # nearest by great-circle distance, at any latitude and without a projected CRS.
+    unmatched = np.flatnonzero(matched_idx < 0)
+    if len(unmatched):
+        zone_tree = cKDTree(ecef_xyz(zone_x, zone_y))
+        _, matched_idx[unmatched] = zone_tree.query(
+            ecef_xyz(act_x[unmatched], act_y[unmatched]), k=1, workers=KDTREE_WORKERS)
+    
+    taz_ids = node_taz_df["node_id"].to_numpy()[matched_idx]
+    zones_with_activities.update(taz_ids)
     
     print(f"  [OK] Connected {len(activity_node_df)} activity nodes to zones")
     print(f"  [OK] {len(zones_with_activities)} zones have activity connectors")
@@ -171,108 +280,90 @@ def generate_connectors(activity_node_df, node_taz_df, updated_link_df, updated_
     print(f"  Zones to connect: {len(zones_without_activities)}")
     
     zones_beyond_radius = []
+    best_links = {}
+    connected_zone_ids, connected_zone_xy = [], []
+    origin_ids, origin_xy = [], []
     
-    def find_best_link(zone_centroid, search_radius, prefer_types):
-        """Find nearest link preferring specified types within radius"""
-        if search_radius is None:
-            possible = updated_link_df
-        else:
-            # Spatial search
-            deg_radius = search_radius / 111320.0
-            search_box = box(zone_centroid.x - deg_radius, zone_centroid.y - deg_radius,
-                           zone_centroid.x + deg_radius, zone_centroid.y + deg_radius)
-            possible_idx = list(link_sindex.intersection(search_box.bounds))
-            possible = updated_link_df.iloc[possible_idx]
+    def find_nearest_links(zones, search_radius, prefer_types):
+        """Match zones to the link with the nearest origin node, preferring specified types within radius"""
+        zone_xyz = ecef_xyz([z["geometry"].x for z in zones], [z["geometry"].y for z in zones])
         
-        if possible.empty:
-            return None
-        
-        best = None
-        best_dist = float('inf')
+        # Represent each link by its origin node, in Earth-centered meters
+        origins = updated_link_df[updated_link_df["from_node_id"].isin(list(node_coords))]
+        origin_xy = np.array([node_coords[n] for n in origins["from_node_id"]], dtype=float).reshape(-1, 2)
+        origin_xyz = ecef_xyz(origin_xy[:, 0], origin_xy[:, 1])
+        upper_bound = np.inf if search_radius is None else chord_radius_m(search_radius)
         
-        for idx, link in possible.iterrows():
-            if link["from_node_id"] not in node_coords:
-                continue
-            
-            origin = Point(*node_coords[link["from_node_id"]])
-            dist = geodesic((zone_centroid.y, zone_centroid.x), (origin.y, origin.x)).meters
-            
-            if search_radius and dist > search_radius:
+        # Nearest preferred link first, then nearest link of any type for the rest
+        matches = {}
+        remaining = np.arange(len(zones))
+        for mask in (origins["link_type"].isin(prefer_types).to_numpy(), np.ones(len(origins), dtype=bool)):
+            if not len(remaining) or not mask.any():
                 continue
-            
-            # Prefer lower-level types, then nearest (FIXED: Clear logic)
-            is_preferred = link["link_type"] in prefer_types
-            is_best_preferred = (best is not None) and (best["link_type"] in prefer_types)
-            
-            # Selection logic:
-            # 1. If no best yet, select this link
-            # 2. If this is preferred and best is not, select this
-            # 3. If both preferred or both not preferred, select nearest
-            if best is None:
-                best = link
-                best_dist = dist
-            elif is_preferred and not is_best_preferred:
-                best = link
-                best_dist = dist
-            elif is_preferred == is_best_preferred and dist < best_dist:
-                best = link
-                best_dist = dist
+            tree = cKDTree(origin_xyz[mask])
+            dist, idx = tree.query(zone_xyz[remaining], k=1, distance_upper_bound=upper_bound,
+                                   workers=KDTREE_WORKERS)
+            found = np.isfinite(dist)
+            link_idx = origins.index[np.flatnonzero(mask)[idx[found]]]
+            for zone_pos, link_label in zip(remaining[found], link_idx):
+                matches[zones[zone_pos]["node_id"]] = updated_link_df.loc[link_label]
+            remaining = remaining[~found]
         
-        return best
+        return matches
+    
+    # Try boundary-based matching first (one bulk spatial-index query for all zones)
+    if has_boundary and zones_without_activities:
+        boundaries = np.array([z["boundary_geometry"] for z in zones_without_activities], dtype=object)
+        zone_pos, link_pos = link_sindex.query(boundaries, predicate="intersects")
+        # Distance from the zone centroid to each candidate link's origin node (NaN if unknown)
+        centroid_x = np.array([z["geometry"].x for z in zones_without_activities], dtype=float)
+        centroid_y = np.array([z["geometry"].y for z in zones_without_activities], dtype=float)
+        origin_nodes = updated_node_df.drop_duplicates("new_node_id", keep="last")
+        origin_pos = pd.Index(origin_nodes["new_node_id"].to_numpy()).get_indexer(
+            updated_link_df["from_node_id"].to_numpy()[link_pos])
+        node_x = np.append(origin_nodes["x_coord"].to_numpy(dtype=float), np.nan)  # -1 -> NaN
+        node_y = np.append(origin_nodes["y_coord"].to_numpy(dtype=float), np.nan)
+        boundary_links = pd.DataFrame({
+            "zone_pos": zone_pos,
+            "link_pos": link_pos,
+            "link_type": updated_link_df["link_type"].to_numpy()[link_pos],
+            "origin_dist": haversine_m(centroid_y[zone_pos], centroid_x[zone_pos],
+                                       node_y[origin_pos], node_x[origin_pos]),
+        })
+        boundary_links["preferred"] = boundary_links["link_type"].isin(lower_level_types)
+        
+        # Prefer lower-level types, then the highest link_type; ties go to the link whose
+        # origin node is nearest the zone centroid, then to the lowest link position
+        boundary_links = boundary_links.sort_values(
+            ["zone_pos", "preferred", "link_type", "origin_dist", "link_pos"],
+            ascending=[True, False, False, True, True], kind="stable"
+        ).drop_duplicates("zone_pos")
+        for pos, link in zip(boundary_links["zone_pos"], boundary_links["link_pos"]):
+            best_links[zones_without_activities[pos]["node_id"]] = updated_link_df.iloc[link]
+    
+    # Radius search (batched KD-tree queries) for zones without a boundary match
+    pending = [z for z in zones_without_activities if z["node_id"] not in best_links]
+    if pending:
+        best_links.update(find_nearest_links(pending, zone_search_radius, lower_level_types))
     
     for zone in zones_without_activities:
         taz_id = zone["node_id"]
-        zone_centroid = zone["geometry"]
-        best_link = None
-        
-        # Try boundary-based matching first
-        if has_boundary:
-            zone_boundary = zone["boundary_geometry"]
-            possible_idx = list(link_sindex.intersection(zone_boundary.bounds))
-            boundary_links = updated_link_df.iloc[possible_idx]
-            boundary_links = boundary_links[boundary_links.intersects(zone_boundary)]
-            
-            if not boundary_links.empty:
-                # Prefer lower-level types
-                lower_links = boundary_links[boundary_links["link_type"].isin(lower_level_types)]
-                best_link = (lower_links if not lower_links.empty else boundary_links).loc[
-                    (lower_links if not lower_links.empty else boundary_links)["link_type"].idxmax()]
+        zone_centroid = (zone["geometry"].x, zone["geometry"].y)
+        best_link = best_links.get(taz_id)
         
-        # Radius search if no boundary match
         if best_link is None:
-            best_link = find_best_link(zone_centroid, zone_search_radius, lower_level_types)
-            
-            if best_link is None:
-                zones_beyond_radius.append(taz_id)
-                continue
+            zones_beyond_radius.append(taz_id)
+            continue
         
         origin_node_id = best_link["from_node_id"]
         if origin_node_id not in node_coords:
             print(f"  [WARNING] Missing origin node {origin_node_id}. Skipping zone {taz_id}.")
             continue
         
-        origin_point = Point(*node_coords[origin_node_id])
-        
-        # Create bi-directional connectors
-        for from_id, to_id, from_pt, to_pt in [
-            (taz_id, origin_node_id, zone_centroid, origin_point),
-            (origin_node_id, taz_id, origin_point, zone_centroid)
-        ]:
-            connector_links.append({
-                "link_id": len(connector_links) + 1,
-                "from_node_id": from_id,
-                "to_node_id": to_id,
-                "dir_flag": 1,
-                "length": round(geodesic((from_pt.y, from_pt.x), (to_pt.y, to_pt.x)).meters, 2),
-                "lanes": 1,
-                "free_speed": 90,
-                "capacity": 99999,
-                "link_type_name": "connector",
-                "link_type": 0,
-                "geometry": f"LINESTRING ({from_pt.x} {from_pt.y}, {to_pt.x} {to_pt.y})",
-                "from_biway": 1,
-                "is_link": 0
-            })
+        connected_zone_ids.append(taz_id)
+        connected_zone_xy.append(zone_centroid)
+        origin_ids.append(origin_node_id)
+        origin_xy.append(node_coords[origin_node_id])
     
     connected = len(zones_without_activities) - len(zones_beyond_radius)
     print(f"  [OK] Connected {connected}/{len(zones_without_activities)} zones to network")
@@ -282,66 +373,80 @@ def generate_connectors(activity_node_df, node_taz_df, updated_link_df, updated_
         print(f"  [{len(zones_beyond_radius)} zones {msg}]")
         print(f"     Zone IDs: {zones_beyond_radius}")
     
-    # Create connector DataFrame
-    connector_df = pd.DataFrame(connector_links)
-    
-    # Add VDF columns
-    connector_df["vdf_toll"] = 0
-    connector_df["allowed_uses"] = None
-    connector_df["vdf_alpha"] = 0.15
-    connector_df["vdf_beta"] = 4
-    connector_df["vdf_plf"] = 1
-    connector_df["vdf_length_mi"] = (connector_df["length"] / 1609).round(2)
-    connector_df["vdf_free_speed_mph"] = (((connector_df["free_speed"] / 1.60934) / 5).round() * 5)
-    connector_df["free_speed_in_mph_raw"] = round(connector_df["vdf_free_speed_mph"] / 5) * 5
-    connector_df["vdf_fftt"] = ((connector_df["length"] / connector_df["free_speed"]) * 0.06).round(2)
+    # Create bi-directional connectors: each (zone, node) pair yields zone -> node, then node -> zone
+    pair_zone_ids = np.concatenate([taz_ids, connected_zone_ids])
+    pair_node_ids = np.concatenate([act_ids, origin_ids])
+    pair_zone_xy = np.concatenate([np.column_stack([zone_x[matched_idx], zone_y[matched_idx]]),
+                                   np.array(connected_zone_xy, dtype=float).reshape(-1, 2)])
+    pair_node_xy = np.concatenate([np.column_stack([act_x, act_y]),
+                                   np.array(origin_xy, dtype=float).reshape(-1, 2)])
+    
+    n_links = 2 * len(pair_zone_ids)
+    from_ids = np.empty(n_links, dtype=np.int64)
+    to_ids = np.empty(n_links, dtype=np.int64)
+    from_xy = np.empty((n_links, 2))
+    to_xy = np.empty((n_links, 2))
+    from_ids[0::2], from_ids[1::2] = pair_zone_ids, pair_node_ids
+    to_ids[0::2], to_ids[1::2] = pair_node_ids, pair_zone_ids
+    from_xy[0::2], from_xy[1::2] = pair_zone_xy, pair_node_xy
+    to_xy[0::2], to_xy[1::2] = pair_node_xy, pair_zone_xy
     
-    for col in ['ref_volume', 'base_volume', 'base_vol_auto', 'restricted_turn_nodes']:
-        connector_df[col] = None
+    # Create connector DataFrame
+    connector_df = pd.DataFrame({
+        "link_id": np.arange(1, n_links + 1),
+        "from_node_id": from_ids,
+        "to_node_id": to_ids,
+        "dir_flag": 1,
+        "length": np.round(haversine_m(from_xy[:, 1], from_xy[:, 0], to_xy[:, 1], to_xy[:, 0]), 2),
+        "lanes": 1,
+        "free_speed": 90,
+        "capacity": 99999,
+        "link_type_name": "connector",
+        "link_type": 0,
+        "geometry": shapely.to_wkt(shapely.linestrings(np.stack([from_xy, to_xy], axis=1)),
+                                   rounding_precision=-1),
+        "from_biway": 1,
+        "is_link": 0
+    })
     
     print(f"\n[OK] Total connector links: {len(connector_df)}")
     
-    output_file = os.path.join(output_path, "connector_links.csv")
-    connector_df.to_csv(output_file, index=False)
-    print(f"  Saved: {output_file}")
-    
     return connector_df
 
 
-def merge_links(updated_link_df, connector_df, output_path):
-    """Merge network and connector links"""
+def merge_links(updated_link_df, connector_df, output_path, fast_io=False):
+    """Merge network and connector links, add VDF columns and save link.csv / connector_links.csv"""
     print("\n" + "="*80)
     print("Merging links...")
     print("="*80)
     
-    # Add VDF columns to network links
-    updated_link_df["vdf_toll"] = 0
-    updated_link_df["allowed_uses"] = None
-    updated_link_df["vdf_alpha"] = 0.15
-    updated_link_df["vdf_beta"] = 4
-    updated_link_df["vdf_plf"] = 1
-    updated_link_df["vdf_length_mi"] = (updated_link_df["length"] / 1609).round(2)
-    updated_link_df["vdf_free_speed_mph"] = (((updated_link_df["free_speed"] / 1.60934) / 5).round() * 5)
-    updated_link_df["free_speed_in_mph_raw"] = round(updated_link_df["vdf_free_speed_mph"] / 5) * 5
-    updated_link_df["vdf_fftt"] = ((updated_link_df["length"] / updated_link_df["free_speed"]) * 0.06).round(2)
+    connector_cols = list(connector_df.columns)
+    connector_dtypes = connector_df.dtypes.to_dict()
     
-    for col in ['ref_volume', 'base_volume', 'base_vol_auto', 'restricted_turn_nodes']:
-        updated_link_df[col] = None
+    # Align columns (network link order first, connector-only columns appended).
+    # Filled columns are object dtype so integer columns survive the concat unchanged.
+    all_cols = updated_link_df.columns.union(connector_df.columns, sort=False)
+    updated_link_df = updated_link_df.reindex(columns=all_cols).astype(
+        {c: object for c in all_cols.difference(updated_link_df.columns)})
+    connector_df = connector_df.reindex(columns=all_cols).astype(
+        {c: object for c in all_cols.difference(connector_df.columns)})
     
-    # Align columns
-    all_cols = set(updated_link_df.columns).union(connector_df.columns)
-    for col in all_cols:
-        if col not in updated_link_df.columns:
-            updated_link_df[col] = None
-        if col not in connector_df.columns:
-            connector_df[col] = None
+    # Merge, then derive VDF columns once for network and connector links
+    final_link = pd.concat([updated_link_df, connector_df], ignore_index=True)
+    add_vdf_columns(final_link)
     
-    connector_df = connector_df[updated_link_df.columns]
+    connector_df = final_link.iloc[len(updated_link_df):].reset_index(drop=True)
+    connector_df = connector_df[connector_cols + [c for c in VDF_COLUMNS if c not in connector_cols]]
+    connector_df = connector_df.astype(connector_dtypes)
     
-    # Merge and sort
-    final_link = pd.concat([updated_link_df, connector_df], ignore_index=True)
-    final_link = final_link.sort_values(by=['from_node_id', 'to_node_id']).reset_index(drop=True)
-    final_link['link_id'] = range(1, len(final_link) + 1)
+    output_file = os.path.join(output_path, "connector_links.csv")
+    save_csv(connector_df, output_file, fast_io)
+    print(f"  [OK] Saved: {output_file}")
+    
+    # Sort and renumber
+    order = np.lexsort((final_link['to_node_id'].to_numpy(), final_link['from_node_id'].to_numpy()))
+    final_link = final_link.iloc[order].reset_index(drop=True)
+    final_link['link_id'] = np.arange(1, len(final_link) + 1, dtype=np.int64)
     
     # Cleanup
     final_link.drop(columns=[c for c in ["VDF_fftt", "VDF_toll_auto", "notes", "toll"] 
@@ -349,13 +454,13 @@ def merge_links(updated_link_df, connector_df, output_path):
     final_link['allowed_uses'] = 'drive'
     
     output_file = os.path.join(output_path, "link.csv")
-    final_link.to_csv(output_file, index=False)
+    save_csv(final_link, output_file, fast_io)
     print(f"  [OK] Saved: {output_file}")
     
-    return final_link
+    return final_link, connector_df
 
 
-def create_node_file(updated_node_df, node_taz_df, output_path):
+def create_node_file(updated_node_df, node_taz_df, output_path, fast_io=False):
     """Create final node file"""
     print("\n" + "="*80)
     print("Creating node file...")
@@ -373,24 +478,26 @@ def create_node_file(updated_node_df, node_taz_df, output_path):
     
     # Merge
     final_node = pd.concat([zone_copy, node_copy], ignore_index=True)
-    final_node = final_node.sort_values(by=['node_id']).reset_index(drop=True)
+    final_node = final_node.iloc[np.argsort(final_node['node_id'].to_numpy(), kind='stable')].reset_index(drop=True)
     
     if 'ctrl_type' in final_node.columns:
         final_node = final_node.drop(columns=['ctrl_type'])
     
-    # Fix geometry
-    for i in range(len(final_node)):
-        geom = final_node.loc[i, 'geometry']
-        needs_fix = pd.isna(geom) or \
-                   (isinstance(geom, str) and geom.strip() == '') or \
-                   (hasattr(geom, 'is_empty') and geom.is_empty)
-        
-        if needs_fix:
-            x, y = final_node.loc[i, 'x_coord'], final_node.loc[i, 'y_coord']
-            final_node.loc[i, 'geometry'] = f"POINT ({x} {y})"
+    # Fix geometry (missing, blank or empty geometries are rebuilt from coordinates)
+    geom = final_node['geometry']
+    values = geom.to_numpy()
+    needs_fix = geom.isna().to_numpy() | shapely.is_empty(np.where(shapely.is_geometry(values), values, None))
+    if geom.dtype == object:
+        needs_fix |= geom.str.strip().eq('').to_numpy()
+    
+    if needs_fix.any():
+        final_node['geometry'] = geom.astype(object)
+        final_node.loc[needs_fix, 'geometry'] = (
+            'POINT (' + final_node.loc[needs_fix, 'x_coord'].astype(str) + ' ' +
+            final_node.loc[needs_fix, 'y_coord'].astype(str) + ')')
     
     output_file = os.path.join(output_path, "node.csv")
-    final_node.to_csv(output_file, index=False)
+    save_csv(final_node, output_file, fast_io)
     print(f"  [OK] Saved: {output_file}")
     
     return final_node
@@ -401,7 +508,7 @@ def create_node_file(updated_node_df, node_taz_df, output_path):
 # ============================================================================
 
 def build_network(zone_search_radius=1000, link_df=None, node_df=None, node_taz_df=None, 
-                  input_path=None, output_path=None):
+                  input_path=None, output_path=None, fast_io=False):
     """
     Build connected transportation network with activity nodes and zone connectors.
     
@@ -426,6 +533,15 @@ def build_network(zone_search_radius=1000, link_df=None, node_df=None, node_taz_
     
     output_path : str, optional
         Path for output files. Default is current_dir/connected_network
+    
+    fast_io : bool, default=False
+        Read and write CSV files with pyarrow's multithreaded engine; link.csv
+        files over 50 MB are read with pyogrio instead (requires pyarrow/pyogrio;
+        falls back to pandas if they are not installed). Written files hold the
+        same values, but pyarrow quotes string values and writes whole-number
+        floats without ".0" (90 instead of 90.0). Parsed input links are cached
+        in output_path/link_source_cache.parquet and reused while link.csv keeps
+        the same path, size and modification time
         
     Returns:
     --------
@@ -464,27 +580,27 @@ def build_network(zone_search_radius=1000, link_df=None, node_df=None, node_taz_
     
     # Load data if not provided
     if link_df is None:
-        link_df = pd.read_csv(os.path.join(input_path, "link.csv"))
+        link_df = load_link_csv(os.path.join(input_path, "link.csv"), fast_io, output_path)
     if node_df is None:
-        node_df = pd.read_csv(os.path.join(input_path, "node.csv"))
+        node_df = load_csv(os.path.join(input_path, "node.csv"), fast_io)
     if node_taz_df is None:
-        node_taz_df = pd.read_csv(os.path.join(input_path, "zone.csv"))
+        node_taz_df = load_csv(os.path.join(input_path, "zone.csv"), fast_io)
     
     # Process data
     updated_node_df, activity_node_df, common_node_df = process_node_data(
-        node_df, node_taz_df, output_path
+        node_df, node_taz_df, output_path, fast_io
     )
     updated_link_df = update_link_node_ids(link_df, updated_node_df)
     
     # Generate connectors
     connector_df = generate_connectors(
         activity_node_df, node_taz_df, updated_link_df, updated_node_df,
-        zone_search_radius, output_path
+        zone_search_radius
     )
     
     # Merge and create final files
-    final_link_df = merge_links(updated_link_df, connector_df, output_path)
-    final_node_df = create_node_file(updated_node_df, node_taz_df, output_path)
+    final_link_df, connector_df = merge_links(updated_link_df, connector_df, output_path, fast_io)
+    final_node_df = create_node_file(updated_node_df, node_taz_df, output_path, fast_io)
     
     # Summary
     elapsed = time.time() - start
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Shared constants and CSV helpers for build_network and enhance_connectors
+"""
+import pandas as pd
+import numpy as np
+import shapely
+
+
+EARTH_RADIUS_M = 6371008.8  # Mean Earth radius (IUGG)
+KDTREE_WORKERS = -1         # Parallel workers for batched KD-tree queries (-1 = all cores)
+M_TO_MI = 1.0 / 1609.0      # Meters to miles (VDF convention)
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance in meters (coordinates in degrees)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def ecef_xyz(x, y):
+    """Earth-centered (x, y, z) coordinates in meters on a sphere for lon/lat arrays (degrees)"""
+    lon, lat = np.radians(x), np.radians(y)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)]) * EARTH_RADIUS_M
+
+
+def chord_radius_m(arc_m):
+    """Straight-line (chord) length in meters for a great-circle distance in meters"""
+    return 2 * EARTH_RADIUS_M * np.sin(arc_m / (2 * EARTH_RADIUS_M))
+
+
+def geometry_to_wkt(df):
+    """Return df with Shapely geometry values written out as WKT strings (copied only if any are found)"""
+    converted = {}
+    for col in df.columns:
+        if df[col].dtype != object and df[col].dtype.name != "geometry":
+            continue
+        values = df[col].to_numpy(dtype=object)
+        is_geom = shapely.is_geometry(values)
+        if is_geom.any():
+            values = values.copy()
+            values[is_geom] = shapely.to_wkt(values[is_geom], rounding_precision=-1)
+            converted[col] = values
+    if not converted:
+        return df
+    df = pd.DataFrame(df)
+    for col, values in converted.items():
+        df[col] = values
+    return df
+
+
+def load_csv(path, fast_io=False, usecols=None, dtype=None):
+    """Read a CSV file (optionally a column subset), using pyarrow's multithreaded reader if fast_io is set"""
+    if fast_io:
+        try:
+            from pyarrow import csv as pa_csv
+        except ImportError:
+            print("  [WARNING] pyarrow not installed, using pandas CSV reader")
+        else:
+            convert_options = pa_csv.ConvertOptions(strings_can_be_null=True, include_columns=usecols)
+            table = pa_csv.read_csv(path, convert_options=convert_options)
+            # Release Arrow buffers column by column to avoid holding two full copies
+            df = table.to_pandas(split_blocks=True, self_destruct=True)
+            return df.astype(dtype) if dtype else df
+    return pd.read_csv(path, usecols=usecols, dtype=dtype)
+
+
+def save_csv(df, path, fast_io=False):
+    """
+    Write a CSV file, using pyarrow's multithreaded writer if fast_io is set
+
+    The pyarrow output parses to the same values but is not byte-identical to
+    pandas: string values are always quoted, whole-number floats lose their
+    ".0" (90 instead of 90.0), booleans are written as true/false, and the
+    header is quoted with pyarrow < 22.
+    """
+    if fast_io:
+        try:
+            import pyarrow as pa
+            from pyarrow import csv as pa_csv
+        except ImportError:
+            print("  [WARNING] pyarrow not installed, using pandas CSV writer")
+        else:
+            try:
+                write_options = pa_csv.WriteOptions(quoting_style="needed", quoting_header="none")
+            except TypeError:  # quoting_header needs pyarrow >= 22
+                write_options = pa_csv.WriteOptions(quoting_style="needed")
+            try:
+                table = pa.Table.from_pandas(geometry_to_wkt(df), preserve_index=False)
+                pa_csv.write_csv(table, path, write_options)
+                return
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                pass  # Mixed-type columns: fall back to the pandas writer
+    df.to_csv(path, index=False)
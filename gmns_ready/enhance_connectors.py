@@ -6,16 +6,135 @@ Adds connectors to zones with poor accessibility (< 10% of total zones)
 """
 import pandas as pd
 import numpy as np
-from geopy.distance import geodesic
-from shapely import wkt
-from shapely.geometry import Point, box
-import geopandas as gpd
+import shapely
+from scipy.spatial import cKDTree
 import os
+import hashlib
 from datetime import datetime
 
+try:
+    from .common import (EARTH_RADIUS_M, KDTREE_WORKERS, M_TO_MI, chord_radius_m, ecef_xyz,
+                         geometry_to_wkt, load_csv, save_csv)
+except ImportError:  # Run as a script from the package directory
+    from common import (EARTH_RADIUS_M, KDTREE_WORKERS, M_TO_MI, chord_radius_m, ecef_xyz,
+                        geometry_to_wkt, load_csv, save_csv)
+
+
+KNN_OVERSAMPLE = 5          # k-nearest pre-query size per link type, as a multiple of its quota
+
+# Connector attributes (loop-invariant VDF terms precomputed once)
+CONNECTOR_FREE_SPEED = 90                                                 # km/h
+CONNECTOR_FREE_SPEED_MPH = round(CONNECTOR_FREE_SPEED / 1.60934 / 5) * 5  # Rounded to 5 mph
+FFTT_MIN_PER_M = 0.06 / CONNECTOR_FREE_SPEED                              # Free-flow minutes per meter
+
+
+def great_circle_m(xyz0, xyz):
+    """Great-circle distance in meters between rows of ECEF points xyz0 and xyz (broadcasting)"""
+    chord = np.linalg.norm(xyz - xyz0, axis=1)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(chord / (2 * EARTH_RADIUS_M), 1.0))
+
+
+def geodesic_m(x0, y0, x, y):
+    """Geodesic distance in meters between lon/lat points (x0, y0) and (x, y) via geopy (slow, exact)"""
+    from geopy.distance import geodesic
+    return np.array([geodesic((b0, a0), (b, a)).meters
+                     for a0, b0, a, b in zip(*np.broadcast_arrays(x0, y0, x, y))], dtype=float)
+
+
+def ball_pairs(tree, points, radius):
+    """Flattened (point position, tree position) pairs within radius, sorted by tree position per point"""
+    neighbors = tree.query_ball_point(points, r=radius, workers=KDTREE_WORKERS, return_sorted=True)
+    point_pos = np.repeat(np.arange(len(points)), [len(n) for n in neighbors])
+    tree_pos = np.concatenate([np.asarray(n, dtype=np.int64) for n in neighbors] +
+                              [np.empty(0, dtype=np.int64)])
+    return point_pos, tree_pos
+
+
+def node_fingerprint(node_xyz):
+    """Digest of the node coordinate array, identifying the nodes a KD-tree cache was built on"""
+    node_xyz = np.ascontiguousarray(node_xyz)
+    return (node_xyz.shape, hashlib.blake2b(node_xyz.tobytes(), digest_size=16).hexdigest())
+
+
+def new_spatial_index(fingerprint):
+    """Empty KD-tree cache for the nodes with this fingerprint; trees are added on first use"""
+    return {'fingerprint': fingerprint, 'node_tree': None, 'bucket_trees': {}}
+
+
+def cached_node_tree(spatial_index, node_xyz):
+    """KD-tree over all nodes, built on first use"""
+    if spatial_index['node_tree'] is None:
+        spatial_index['node_tree'] = cKDTree(node_xyz)
+    return spatial_index['node_tree']
+
+
+def cached_bucket_tree(spatial_index, bucket, bucket_nodes, node_xyz):
+    """KD-tree over the origin nodes of one link type bucket, rebuilt if those nodes changed"""
+    cached = spatial_index['bucket_trees'].get(bucket)
+    if cached is None or not np.array_equal(cached[0], bucket_nodes):
+        cached = (bucket_nodes, cKDTree(node_xyz[bucket_nodes]))
+        spatial_index['bucket_trees'][bucket] = cached
+    return cached[1]
+
+
+def pair_key_index(*ids):
+    """None if all IDs fit pack_pairs, else a sorted Index of the IDs whose positions are packed instead"""
+    ids = np.concatenate([np.asarray(i, dtype=np.int64) for i in ids])
+    if len(ids) == 0 or (ids.min() >= 0 and ids.max() < 2 ** 31):
+        return None
+    return pd.Index(np.unique(ids))
+
+
+def pack_pairs(a, b, key_index=None):
+    """
+    Order-independent int64 key per node pair: (min << 32) | max
+
+    IDs must be in [0, 2**31); for other IDs pass key_index from pair_key_index
+    and their positions in it are packed instead.
+    """
+    if key_index is not None:
+        a, b = key_index.get_indexer(a), key_index.get_indexer(b)
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    return (np.minimum(a, b) << 32) | np.maximum(a, b)
+
+
+def gather_csr(indptr, indices, rows):
+    """Concatenate indices[indptr[r]:indptr[r + 1]] for every r in rows (vectorized CSR row gather)"""
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return indices[np.repeat(starts, counts) + offsets]
+
+
+# Report sections: key in zone_details and heading in the text report
+REPORT_TYPE_NAMES = {1: 'type_1', 2: 'type_2', 3: 'type_3', 4: 'type_4_plus'}
+REPORT_TYPE_LABELS = {1: 'Type 1 (Highway/Freeway)', 2: 'Type 2 (Arterial)',
+                      3: 'Type 3 (Collector)', 4: 'Type 4+ (Local)'}
+
+
+def type_bucket(link_type):
+    """int64 selection bucket per link type: 1-3 as is, 4 for Type 4+ and missing link types"""
+    link_type = np.asarray(link_type, dtype=float)
+    return np.where(np.isnan(link_type) | (link_type > 3), 4, link_type).astype(np.int64)
+
+
+def group_rank(*keys):
+    """0-based position of each row within its run of equal keys (rows must be sorted by keys)"""
+    n = len(keys[0])
+    new_group = np.zeros(n, dtype=bool)
+    new_group[:1] = True
+    for key in keys:
+        new_group[1:] |= key[1:] != key[:-1]
+    positions = np.arange(n)
+    return positions - np.maximum.accumulate(np.where(new_group, positions, 0))
+
 
 def enhance_connectors(search_radius=1000, accessibility_threshold=0.10, 
-                      min_connectors=6, input_path=None, output_path=None):
+                      min_connectors=6, input_path=None, output_path=None,
+                      use_geodesic=False, fast_io=False, link_df=None, node_df=None,
+                      accessibility_df=None, spatial_index=None):
     """
     Improve zone accessibility by adding connectors to poorly connected zones.
     
@@ -43,11 +162,38 @@ def enhance_connectors(search_radius=1000, accessibility_threshold=0.10,
         Output directory for enhanced files.
         Default is input_path/connected_network.
     
+    use_geodesic : bool, default=False
+        Measure zone-to-node distances with geopy's geodesic (ellipsoid)
+        instead of the vectorized great-circle distance (about 0.5% apart at
+        most, but much slower). Requires geopy.
+    
+    fast_io : bool, default=False
+        Read the input CSVs and write link_enhanced.csv with pyarrow's
+        multithreaded CSV reader/writer (falls back to pandas if pyarrow
+        is not installed). The output holds the same values, but pyarrow
+        quotes string values and writes whole-number floats without ".0"
+        (90 instead of 90.0).
+    
+    link_df : pd.DataFrame, optional
+        Link dataframe (e.g. from build_network). If None, reads link.csv
+    
+    node_df : pd.DataFrame, optional
+        Node dataframe (e.g. from build_network). If None, reads node.csv
+    
+    accessibility_df : pd.DataFrame, optional
+        Zone accessibility dataframe. If None, reads zone_accessibility.csv
+    
+    spatial_index : dict, optional
+        KD-tree cache returned in report_dict['spatial_index'] by a previous
+        call on the same node_df; trees in it are reused instead of rebuilt
+        (a cache built on different node coordinates is discarded).
+    
     Returns:
     --------
     tuple : (final_link_df, report_dict)
         - final_link_df: Enhanced link dataframe
-        - report_dict: Dictionary with enhancement details
+        - report_dict: Dictionary with enhancement details (including the
+          KD-tree cache under 'spatial_index' for reuse)
     
     Examples:
     ---------
@@ -63,6 +209,14 @@ def enhance_connectors(search_radius=1000, accessibility_threshold=0.10,
     ...     accessibility_threshold=0.15,
     ...     min_connectors=8
     ... )
+    
+    >>> # In-memory pipeline: reuse build_network output and the KD-trees
+    >>> link_df, node_df, _ = gr.build_network()
+    >>> enhanced_df, report = gr.enhance_connectors(link_df=link_df, node_df=node_df)
+    >>> enhanced_df, report = gr.enhance_connectors(
+    ...     search_radius=1500, link_df=link_df, node_df=node_df,
+    ...     spatial_index=report['spatial_index']
+    ... )
     """
     
     # Connector targets by link type (distribute min_connectors)
@@ -101,15 +255,31 @@ def enhance_connectors(search_radius=1000, accessibility_threshold=0.10,
     link_file = os.path.join(connected_network_dir, "link.csv")
     node_file = os.path.join(connected_network_dir, "node.csv")
     
-    if not os.path.exists(accessibility_file):
-        raise FileNotFoundError(
-            f"zone_accessibility.csv not found in {connected_network_dir}. "
-            "Please run accessibility analysis first."
-        )
-    
-    accessibility_df = pd.read_csv(accessibility_file)
-    link_df = pd.read_csv(link_file)
-    node_df = pd.read_csv(node_file)
+    # Only parse the columns used here; link.csv is read whole since it is written back
+    if accessibility_df is None:
+        if not os.path.exists(accessibility_file):
+            raise FileNotFoundError(
+                f"zone_accessibility.csv not found in {connected_network_dir}. "
+                "Please run accessibility analysis first."
+            )
+        accessibility_df = load_csv(accessibility_file, fast_io,
+                                    usecols=['zone_id', 'origin_count', 'destination_count'])
+    if link_df is None:
+        link_df = load_csv(link_file, fast_io)
+    else:
+        # In-memory links may hold Shapely geometries; write them out as WKT like link.csv
+        link_df = pd.DataFrame(geometry_to_wkt(link_df))
+    if node_df is None:
+        node_df = load_csv(node_file, fast_io, usecols=['node_id', 'x_coord', 'y_coord'],
+                           dtype={'x_coord': 'float64', 'y_coord': 'float64'})
+    else:
+        node_df = node_df[['node_id', 'x_coord', 'y_coord']].astype({'x_coord': 'float64',
+                                                                     'y_coord': 'float64'})
+    # Duplicate node_ids resolve to their last row, as a dict lookup would
+    n_nodes = len(node_df)
+    node_df = node_df.drop_duplicates('node_id', keep='last')
+    if len(node_df) < n_nodes:
+        print(f"  [WARNING] {n_nodes - len(node_df)} duplicate node_id rows, using the last of each")
     
     print(f"  Loaded {len(accessibility_df)} zones")
     print(f"  Loaded {len(link_df)} links")
@@ -135,37 +305,51 @@ def enhance_connectors(search_radius=1000, accessibility_threshold=0.10,
     
     if not problematic_zones:
         print("\n[OK] No poorly connected zones found. Network is well connected!")
-        return link_df, {'problematic_zones': 0, 'new_connectors': 0}
+        # Same report keys as a full run; any passed-in KD-tree cache is handed back unchanged
+        return link_df, {'problematic_zones': 0, 'new_connectors': 0, 'total_links': len(link_df),
+                         'zone_details': {}, 'output_file': None, 'report_file': None,
+                         'spatial_index': spatial_index}
     
     # ========================================================================
-    # PREPARE GEOMETRIES AND SPATIAL INDEX
+    # PREPARE SPATIAL INDEX
     # ========================================================================
     print("\n[3/7] Preparing spatial data...")
     
-    # Convert geometries
-    if link_df["geometry"].dtype == object:
-        link_df["geometry"] = link_df["geometry"].apply(wkt.loads)
-    if not isinstance(link_df, gpd.GeoDataFrame):
-        link_df = gpd.GeoDataFrame(link_df, geometry="geometry", crs="EPSG:4326")
-    
-    # Build spatial index
-    link_sindex = link_df.sindex
-    
-    # Create node coordinate lookup
-    node_coords = {row["node_id"]: (row["x_coord"], row["y_coord"]) 
-                   for _, row in node_df.iterrows()}
+    # Node coordinate arrays and link origin positions into them (-1 = unknown node)
+    node_x = node_df["x_coord"].to_numpy(dtype=float)
+    node_y = node_df["y_coord"].to_numpy(dtype=float)
+    node_index = pd.Index(node_df["node_id"].to_numpy())
+    from_idx = node_index.get_indexer(link_df["from_node_id"].to_numpy())
     
     # Get zone coordinates - zones are nodes where node_id equals zone_id
-    zone_coords = {}
-    for zone_id in problematic_zones:
-        zone_node = node_df[node_df['node_id'] == zone_id]
-        if not zone_node.empty:
-            row = zone_node.iloc[0]
-            zone_coords[zone_id] = Point(row["x_coord"], row["y_coord"])
-        else:
-            print(f"  [WARNING] Zone {zone_id} not found in node.csv")
-    
-    print(f"  Built spatial index")
+    zone_pos = node_index.get_indexer(problematic_zones)
+    for zone_id in np.asarray(problematic_zones)[zone_pos < 0]:
+        print(f"  [WARNING] Zone {zone_id} not found in node.csv")
+    zone_coords = {zone_id: (node_x[pos], node_y[pos])
+                   for zone_id, pos in zip(problematic_zones, zone_pos) if pos >= 0}
+    
+    # 3-D KD-trees over Earth-centered node coordinates: a chord-length radius query is an exact
+    # great-circle radius query at any latitude. Trees are built on first use and cached in
+    # spatial_index, which is returned for reuse by later calls on the same network.
+    node_xyz = ecef_xyz(node_x, node_y)
+    fingerprint = node_fingerprint(node_xyz)
+    if spatial_index is None or spatial_index.get('fingerprint') != fingerprint:
+        if spatial_index is not None:
+            print("  [WARNING] spatial_index does not match node_df, rebuilding KD-trees")
+        spatial_index = new_spatial_index(fingerprint)
+    zone_ids = np.array(list(zone_coords), dtype=np.int64)
+    zone_x = np.array([x for x, _ in zone_coords.values()], dtype=float)
+    zone_y = np.array([y for _, y in zone_coords.values()], dtype=float)
+    zone_xyz = ecef_xyz(zone_x, zone_y)
+    
+    # CSR index node position -> positions of the links leaving it:
+    # node_links[node_link_ptr[n]:node_link_ptr[n + 1]] are the links with from-node n
+    known_links = np.flatnonzero(from_idx >= 0)
+    node_links = known_links[np.argsort(from_idx[known_links], kind='stable')]
+    node_link_ptr = np.concatenate([[0], np.cumsum(np.bincount(from_idx[known_links],
+                                                               minlength=len(node_df)))])
+    
+    print(f"  Indexed {len(node_df)} nodes")
     print(f"  Found {len(zone_coords)}/{len(problematic_zones)} zone coordinates")
     
     # ========================================================================
@@ -173,241 +357,213 @@ def enhance_connectors(search_radius=1000, accessibility_threshold=0.10,
     # ========================================================================
     print("\n[4/7] Analyzing existing connectors...")
     
-    # Connectors have link_type = 0
-    existing_connectors = link_df[link_df['link_type'] == 0].copy()
-    existing_connections = set()
+    # Connectors have link_type = 0 (masked on the key columns; no filtered copy of link_df)
+    link_from = link_df["from_node_id"].to_numpy()
+    link_type_arr = link_df["link_type"].to_numpy()
+    is_connector = link_type_arr == 0
     
-    for _, conn in existing_connectors.iterrows():
-        # Store both directions
-        existing_connections.add((conn['from_node_id'], conn['to_node_id']))
-        existing_connections.add((conn['to_node_id'], conn['from_node_id']))
+    # Connected node pairs as sorted unique int64 keys, one per pair regardless of direction. IDs that
+    # do not fit the packing (negative or >= 2**31, e.g. raw OSM IDs) are packed by rank.
+    connector_to = link_df["to_node_id"].to_numpy()[is_connector]
+    key_index = pair_key_index(link_from, connector_to, zone_ids)
+    if key_index is not None:
+        print("  Node IDs outside [0, 2**31), packing connection keys by ID rank")
+    existing_keys = np.unique(pack_pairs(link_from[is_connector], connector_to, key_index))
     
-    print(f"  Found {len(existing_connectors)} existing connectors")
-    print(f"  Unique connections: {len(existing_connections)}")
+    print(f"  Found {is_connector.sum()} existing connectors")
+    print(f"  Unique connections: {len(existing_keys)}")
     
     # ========================================================================
     # GENERATE NEW CONNECTORS
     # ========================================================================
     print("\n[5/7] Generating new connectors...")
     
-    new_connectors = []
-    zone_connector_report = {}
-    
-    for idx, zone_id in enumerate(problematic_zones, 1):
-        if zone_id not in zone_coords:
-            print(f"  [WARNING] Zone {zone_id} not found in coordinates, skipping")
-            continue
-        
-        print(f"  Processing zone {zone_id} ({idx}/{len(problematic_zones)})...", end='\r')
-        
-        zone_point = zone_coords[zone_id]
-        zone_connector_report[zone_id] = {
-            'type_1': [],
-            'type_2': [],
-            'type_3': [],
-            'type_4_plus': []
-        }
-        
-        # Use spatial index with bounding box for faster search
-        search_radius_deg = search_radius / 111320.0
-        minx = zone_point.x - search_radius_deg
-        maxx = zone_point.x + search_radius_deg
-        miny = zone_point.y - search_radius_deg
-        maxy = zone_point.y + search_radius_deg
-        
-        search_box = box(minx, miny, maxx, maxy)
+    # Candidate (zone, node) pairs. Every node within the radius can be tens of thousands of
+    # candidates per zone in dense networks, so first take only the k nearest origin nodes of
+    # each type bucket (restricted k-nearest query); zones where that turns out too few fall
+    # back to the full radius query below. Geodesic distances do not follow the tree's order,
+    # so use_geodesic always uses the radius query.
+    link_bucket = type_bucket(link_type_arr)
+    bucket_quota = np.array([CONNECTOR_TARGETS[bucket] for bucket in (1, 2, 3, 4)])
+    # Distance of the k-th nearest origin per zone and bucket (inf = every origin in radius taken)
+    bucket_reach = np.full((len(zone_ids), 4), np.inf)
+    if use_geodesic:
+        nbr_zone, nbr_node = ball_pairs(cached_node_tree(spatial_index, node_xyz), zone_xyz,
+                                        chord_radius_m(search_radius))
+    else:
+        pair_keys = []
+        for bucket in (1, 2, 3, 4):
+            bucket_nodes = np.unique(from_idx[(link_bucket == bucket) & (from_idx >= 0)])
+            quota = bucket_quota[bucket - 1] + (min_connectors if bucket == 4 else 0)
+            k = min(KNN_OVERSAMPLE * quota, len(bucket_nodes))
+            if k == 0:
+                continue
+            # Slightly widened bound; candidates beyond the radius are dropped by distance below
+            bucket_tree = cached_bucket_tree(spatial_index, bucket, bucket_nodes, node_xyz)
+            dist, pos = bucket_tree.query(
+                zone_xyz, k=k, distance_upper_bound=chord_radius_m(search_radius) * (1 + 1e-9),
+                workers=KDTREE_WORKERS)
+            dist, pos = dist.reshape(len(zone_ids), k), pos.reshape(len(zone_ids), k)
+            if k < len(bucket_nodes):
+                saturated = np.isfinite(dist[:, -1])
+                bucket_reach[saturated, bucket - 1] = 2 * EARTH_RADIUS_M * np.arcsin(
+                    dist[saturated, -1] / (2 * EARTH_RADIUS_M))
+            zone_pos, rank = np.nonzero(pos < len(bucket_nodes))
+            pair_keys.append(zone_pos * len(node_df) + bucket_nodes[pos[zone_pos, rank]])
+        pair_keys = np.unique(np.concatenate(pair_keys + [np.empty(0, dtype=np.int64)]))
+        nbr_zone, nbr_node = pair_keys // len(node_df), pair_keys % len(node_df)
+    
+    while True:
+        # Candidate stage for all zones at once. Zones are independent here: every pair a zone
+        # can add includes the zone itself, so one zone's connectors never affect another's.
+        # Expand each (zone, neighbor node) pair to the node's outgoing links.
+        cand_idx = gather_csr(node_link_ptr, node_links, nbr_node)
+        cand_zone = np.repeat(nbr_zone, np.diff(node_link_ptr)[nbr_node])
+        cand_from = from_idx[cand_idx]
         
-        # Get candidate links using spatial index
-        possible_idx = list(link_sindex.intersection(search_box.bounds))
-        candidate_links = link_df.iloc[possible_idx]
+        # Distances for every (zone, candidate origin) pair in one call; keep those within radius
+        if use_geodesic:
+            cand_dist = geodesic_m(zone_x[cand_zone], zone_y[cand_zone], node_x[cand_from], node_y[cand_from])
+        else:
+            cand_dist = great_circle_m(zone_xyz[cand_zone], node_xyz[cand_from])
+        cand_origin = link_from[cand_idx]
+        cand_type = link_type_arr[cand_idx]
+        cand_key = pack_pairs(zone_ids[cand_zone], cand_origin, key_index)
         
-        # Find nearest links of each type within radius
-        links_by_type = {1: [], 2: [], 3: [], 4: []}
+        # Skip existing connectors and origins already connected to the zone
+        connected = np.isin(cand_key, existing_keys)
+        keep = (cand_dist <= search_radius) & (cand_type != 0) & ~connected
+        cand_zone, cand_from, cand_dist = cand_zone[keep], cand_from[keep], cand_dist[keep]
+        cand_origin, cand_type, cand_key = cand_origin[keep], cand_type[keep], cand_key[keep]
         
-        for _, link in candidate_links.iterrows():
-            origin_id = link["from_node_id"]
-            if origin_id not in node_coords:
-                continue
-            
-            # Skip existing connectors
-            if link['link_type'] == 0:
-                continue
-            
-            # Check if connection already exists
-            if (zone_id, origin_id) in existing_connections:
-                continue
-            
-            origin_x, origin_y = node_coords[origin_id]
-            origin_point = Point(origin_x, origin_y)
-            
-            distance = geodesic(
-                (zone_point.y, zone_point.x),
-                (origin_point.y, origin_point.x)
-            ).meters
-            
-            # Skip if beyond search radius
-            if distance > search_radius:
-                continue
-            
-            link_type = link["link_type"]
-            type_key = link_type if link_type <= 3 else 4
-            
-            links_by_type[type_key].append({
-                'link': link,
-                'origin_id': origin_id,
-                'origin_point': origin_point,
-                'distance': distance
-            })
+        # Order candidates by zone, type bucket, then distance (stable, so ties keep node order)
+        type_key = type_bucket(cand_type)
+        order = np.lexsort((cand_dist, type_key, cand_zone))
+        cand_zone, cand_from, cand_dist = cand_zone[order], cand_from[order], cand_dist[order]
+        cand_origin, cand_type, cand_key = cand_origin[order], cand_type[order], cand_key[order]
+        type_key = type_key[order]
         
-        # Sort each type by distance
-        for type_key in links_by_type:
-            links_by_type[type_key].sort(key=lambda x: x['distance'])
+        # Select for all zones at once: the nearest CONNECTOR_TARGETS[type] links of each type...
+        target_count = np.zeros(len(type_key), dtype=np.int64)
+        for link_type, count in CONNECTOR_TARGETS.items():
+            target_count[type_key == (link_type if link_type <= 3 else 4)] = count
+        picked = group_rank(cand_zone, type_key) < target_count
         
-        # Add connectors based on targets
-        connectors_added = 0
+        # ...then top up with the nearest remaining Type 4+ origins to reach min_connectors
+        needed = min_connectors - np.bincount(cand_zone[picked], minlength=len(zone_ids))
+        spare = np.flatnonzero((type_key == 4) & ~np.isin(cand_key, cand_key[picked]))
+        topped_up = spare[group_rank(cand_zone[spare]) < needed[cand_zone[spare]]]
         
-        for link_type, target_count in CONNECTOR_TARGETS.items():
-            type_key = link_type if link_type <= 3 else 4
-            available = links_by_type[type_key]
-            
-            for i in range(min(target_count, len(available))):
-                link_info = available[i]
-                origin_id = link_info['origin_id']
-                origin_point = link_info['origin_point']
-                distance = link_info['distance']
-                
-                # Create bi-directional connectors
-                for from_id, to_id, from_pt, to_pt in [
-                    (zone_id, origin_id, zone_point, origin_point),
-                    (origin_id, zone_id, origin_point, zone_point)
-                ]:
-                    length = geodesic((from_pt.y, from_pt.x), (to_pt.y, to_pt.x)).meters
-                    new_connectors.append({
-                        "from_node_id": from_id,
-                        "to_node_id": to_id,
-                        "dir_flag": 1,
-                        "length": round(length, 2),
-                        "lanes": 1,
-                        "free_speed": 90,
-                        "capacity": 99999,
-                        "link_type_name": "connector",
-                        "link_type": 0,
-                        "geometry": f"LINESTRING ({from_pt.x} {from_pt.y}, {to_pt.x} {to_pt.y})",
-                        "allowed_uses": "drive",
-                        "from_biway": 1,
-                        "is_link": 0,
-                        "vdf_toll": 0,
-                        "vdf_alpha": 0.15,
-                        "vdf_beta": 4,
-                        "vdf_plf": 1,
-                        "vdf_length_mi": round(length / 1609, 2),
-                        "vdf_free_speed_mph": round(((90 / 1.60934) / 5)) * 5,
-                        "free_speed_in_mph_raw": round(((90 / 1.60934) / 5)) * 5,
-                        "vdf_fftt": round((length / 90) * 0.06, 2),
-                        "ref_volume": None,
-                        "base_volume": None,
-                        "base_vol_auto": None,
-                        "restricted_turn_nodes": None
-                    })
-                
-                # Track for report (only outgoing connector)
-                type_name = f'type_{link_type}' if link_type <= 3 else 'type_4_plus'
-                zone_connector_report[zone_id][type_name].append({
-                    'origin_node': origin_id,
-                    'link_type': link_info['link']['link_type'],
-                    'distance_m': round(distance, 2)
-                })
-                
-                connectors_added += 1
-                
-                # Mark as used
-                existing_connections.add((zone_id, origin_id))
-                existing_connections.add((origin_id, zone_id))
+        # A truncated bucket is exact only if it filled its quota with links strictly nearer
+        # than its k-th origin (no nearer link can be missing); otherwise use the radius query
+        picked_pos = np.flatnonzero(picked)
+        picked_count = np.bincount(cand_zone[picked_pos] * 4 + type_key[picked_pos] - 1,
+                                   minlength=4 * len(zone_ids)).reshape(-1, 4)
+        short = picked_count < bucket_quota
+        short[:, 3] |= np.bincount(cand_zone[topped_up], minlength=len(zone_ids)) < needed
+        failed = (short & np.isfinite(bucket_reach)).any(axis=1)
+        selected = np.concatenate([picked_pos, topped_up])
+        too_far = cand_dist[selected] >= bucket_reach[cand_zone[selected], type_key[selected] - 1] * (1 - 1e-9)
+        failed[cand_zone[selected][too_far]] = True
+        if not failed.any():
+            break
         
-        # Add more Type 4+ if needed to reach minimum
-        if connectors_added < min_connectors:
-            needed = min_connectors - connectors_added
-            available = [x for x in links_by_type[4] 
-                        if (zone_id, x['origin_id']) not in existing_connections]
-            
-            for i in range(min(needed, len(available))):
-                link_info = available[i]
-                origin_id = link_info['origin_id']
-                origin_point = link_info['origin_point']
-                distance = link_info['distance']
-                
-                for from_id, to_id, from_pt, to_pt in [
-                    (zone_id, origin_id, zone_point, origin_point),
-                    (origin_id, zone_id, origin_point, zone_point)
-                ]:
-                    length = geodesic((from_pt.y, from_pt.x), (to_pt.y, to_pt.x)).meters
-                    new_connectors.append({
-                        "from_node_id": from_id,
-                        "to_node_id": to_id,
-                        "dir_flag": 1,
-                        "length": round(length, 2),
-                        "lanes": 1,
-                        "free_speed": 90,
-                        "capacity": 99999,
-                        "link_type_name": "connector",
-                        "link_type": 0,
-                        "geometry": f"LINESTRING ({from_pt.x} {from_pt.y}, {to_pt.x} {to_pt.y})",
-                        "allowed_uses": "drive",
-                        "from_biway": 1,
-                        "is_link": 0,
-                        "vdf_toll": 0,
-                        "vdf_alpha": 0.15,
-                        "vdf_beta": 4,
-                        "vdf_plf": 1,
-                        "vdf_length_mi": round(length / 1609, 2),
-                        "vdf_free_speed_mph": round(((90 / 1.60934) / 5)) * 5,
-                        "free_speed_in_mph_raw": round(((90 / 1.60934) / 5)) * 5,
-                        "vdf_fftt": round((length / 90) * 0.06, 2),
-                        "ref_volume": None,
-                        "base_volume": None,
-                        "base_vol_auto": None,
-                        "restricted_turn_nodes": None
-                    })
-                
-                zone_connector_report[zone_id]['type_4_plus'].append({
-                    'origin_node': origin_id,
-                    'link_type': link_info['link']['link_type'],
-                    'distance_m': round(distance, 2)
-                })
-                
-                connectors_added += 1
-                existing_connections.add((zone_id, origin_id))
-                existing_connections.add((origin_id, zone_id))
-    
-    print(f"\n  [OK] Generated {len(new_connectors)} new connector links")
+        failed_zones = np.flatnonzero(failed)
+        print(f"  k-nearest candidates too few for {len(failed_zones)} zones, using radius search")
+        retry_zone, retry_node = ball_pairs(cached_node_tree(spatial_index, node_xyz), zone_xyz[failed_zones],
+                                            chord_radius_m(search_radius))
+        kept_pairs = ~failed[nbr_zone]
+        nbr_zone = np.concatenate([nbr_zone[kept_pairs], failed_zones[retry_zone]])
+        nbr_node = np.concatenate([nbr_node[kept_pairs], retry_node])
+        order = np.lexsort((nbr_node, nbr_zone))
+        nbr_zone, nbr_node = nbr_zone[order], nbr_node[order]
+        bucket_reach[failed] = np.inf
+    
+    # Emit per zone: target picks (by type, then distance) followed by the top-ups
+    selected = np.concatenate([np.flatnonzero(picked), topped_up])
+    is_top_up = np.repeat([False, True], [picked.sum(), len(topped_up)])
+    emit_order = np.lexsort((selected, is_top_up, cand_zone[selected]))
+    selected, is_top_up = selected[emit_order], is_top_up[emit_order]
+    
+    # Bi-directional connector columns: zone -> origin at even rows, origin -> zone at odd rows
+    n_new = 2 * len(selected)
+    sel_zone = zone_ids[cand_zone[selected]]
+    sel_origin = cand_origin[selected]
+    from_arr = np.empty(n_new, dtype=link_from.dtype)
+    to_arr = np.empty(n_new, dtype=link_from.dtype)
+    from_arr[0::2], from_arr[1::2] = sel_zone, sel_origin
+    to_arr[0::2], to_arr[1::2] = sel_origin, sel_zone
+    length_arr = np.repeat(cand_dist[selected], 2)
+    zone_pt = np.column_stack([zone_x[cand_zone[selected]], zone_y[cand_zone[selected]]])
+    origin_pt = np.column_stack([node_x[cand_from[selected]], node_y[cand_from[selected]]])
+    coords = np.empty((n_new, 2, 2))
+    coords[0::2, 0], coords[0::2, 1] = zone_pt, origin_pt
+    coords[1::2, 0], coords[1::2, 1] = origin_pt, zone_pt
+    geometry_arr = shapely.to_wkt(shapely.linestrings(coords), rounding_precision=-1)
+    
+    # Emissions table for the report: the outgoing connector of each pair, in emission order
+    emissions = pd.DataFrame({
+        'zone_id': sel_zone,
+        'report_type': np.where(is_top_up, 4, type_key[selected]),
+        'origin_node': sel_origin,
+        'link_type': cand_type[selected],
+        'distance_m': np.round(cand_dist[selected], 2),
+    })
+    
+    zone_connector_report = {zone_id: {name: [] for name in REPORT_TYPE_NAMES.values()}
+                             for zone_id in zone_coords}
+    for (zone_id, report_type), group in emissions.groupby(['zone_id', 'report_type']):
+        zone_connector_report[zone_id][REPORT_TYPE_NAMES[report_type]] = group[
+            ['origin_node', 'link_type', 'distance_m']].to_dict('records')
+    
+    print(f"\n  [OK] Generated {n_new} new connector links")
     
     # ========================================================================
     # MERGE AND SAVE
     # ========================================================================
     print("\n[6/7] Merging and saving...")
     
-    # Create DataFrame from new connectors
-    new_connector_df = pd.DataFrame(new_connectors)
-    
-    # Align columns with existing link_df
-    for col in link_df.columns:
-        if col not in new_connector_df.columns:
-            new_connector_df[col] = None
-    
-    new_connector_df = new_connector_df[link_df.columns]
-    
-    # Merge with existing links
-    final_link_df = pd.concat([link_df, new_connector_df], ignore_index=True)
-    
-    # Sort and renumber link_id
-    final_link_df = final_link_df.sort_values(
-        by=['from_node_id', 'to_node_id']
-    ).reset_index(drop=True)
-    final_link_df['link_id'] = range(1, len(final_link_df) + 1)
+    # Create DataFrame from the connector columns (zone -> origin and origin -> zone rows interleaved)
+    new_connector_df = pd.DataFrame({
+        "from_node_id": from_arr,
+        "to_node_id": to_arr,
+        "dir_flag": 1,
+        "length": np.round(length_arr, 2),
+        "lanes": 1,
+        "free_speed": CONNECTOR_FREE_SPEED,
+        "capacity": 99999,
+        "link_type_name": "connector",
+        "link_type": 0,
+        "geometry": geometry_arr,
+        "allowed_uses": "drive",
+        "from_biway": 1,
+        "is_link": 0,
+        "vdf_toll": 0,
+        "vdf_alpha": 0.15,
+        "vdf_beta": 4,
+        "vdf_plf": 1,
+        "vdf_length_mi": np.round(length_arr * M_TO_MI, 2),
+        "vdf_free_speed_mph": CONNECTOR_FREE_SPEED_MPH,
+        "free_speed_in_mph_raw": CONNECTOR_FREE_SPEED_MPH,
+        "vdf_fftt": np.round(length_arr * FFTT_MIN_PER_M, 2),
+    })
+    
+    # Align columns with existing link_df (columns the connectors lack stay empty)
+    missing_cols = link_df.columns.difference(new_connector_df.columns)
+    new_connector_df = new_connector_df.reindex(columns=link_df.columns).astype(
+        {col: object for col in missing_cols})
+    
+    # Merge with existing links in (from_node_id, to_node_id) order, computed on the key
+    # arrays so the merged table is only reordered once, then renumber link_id
+    order = np.lexsort((np.concatenate([link_df['to_node_id'].to_numpy(), to_arr]),
+                        np.concatenate([link_df['from_node_id'].to_numpy(), from_arr])))
+    final_link_df = pd.concat([link_df, new_connector_df], ignore_index=True).take(order)
+    final_link_df = final_link_df.reset_index(drop=True)
+    final_link_df['link_id'] = np.arange(1, len(final_link_df) + 1, dtype=np.int64)
     
     # Save updated links
     output_file = os.path.join(output_path, "link_enhanced.csv")
-    final_link_df.to_csv(output_file, index=False)
+    save_csv(final_link_df, output_file, fast_io)
     print(f"  [OK] Saved: {output_file}")
     
     # ========================================================================
@@ -434,40 +590,32 @@ def enhance_connectors(search_radius=1000, accessibility_threshold=0.10,
     report_lines.append("")
     report_lines.append("RESULTS:")
     report_lines.append(f"  Problematic zones identified: {len(problematic_zones)}")
-    report_lines.append(f"  New connector links generated: {len(new_connectors)}")
+    report_lines.append(f"  New connector links generated: {n_new}")
     report_lines.append(f"  Total links in enhanced file: {len(final_link_df)}")
     report_lines.append("")
     report_lines.append("="*80)
     report_lines.append("NEW CONNECTORS BY ZONE")
     report_lines.append("="*80)
     
+    # Format every connector line at once, then join them into one text block per zone
+    origin = emissions['origin_node'].astype(str)
+    distance = emissions['distance_m'].astype(str) + "m"
+    emissions['line'] = np.where(
+        emissions['report_type'] == 4,
+        "    -> Origin Node " + origin + " (Type " + emissions['link_type'].astype(str) + "): " + distance,
+        "    -> Origin Node " + origin + ": " + distance)
+    type_blocks = emissions.groupby(['zone_id', 'report_type'])['line'].agg(
+        count='size', lines='\n'.join).reset_index()
+    type_blocks['block'] = ("  " + type_blocks['report_type'].map(REPORT_TYPE_LABELS) + ": " +
+                            type_blocks['count'].astype(str) + " connectors\n" + type_blocks['lines'])
+    zone_blocks = type_blocks.groupby('zone_id')['block'].agg('\n'.join)
+    zone_totals = emissions.groupby('zone_id').size()
+    
     for zone_id in sorted(zone_connector_report.keys()):
-        report = zone_connector_report[zone_id]
-        total = (len(report['type_1']) + len(report['type_2']) + 
-                 len(report['type_3']) + len(report['type_4_plus']))
-        
-        report_lines.append(f"\nZone {zone_id}: {total} new connectors")
+        report_lines.append(f"\nZone {zone_id}: {zone_totals.get(zone_id, 0)} new connectors")
         report_lines.append("-" * 80)
-        
-        if report['type_1']:
-            report_lines.append(f"  Type 1 (Highway/Freeway): {len(report['type_1'])} connectors")
-            for conn in report['type_1']:
-                report_lines.append(f"    -> Origin Node {conn['origin_node']}: {conn['distance_m']}m")
-        
-        if report['type_2']:
-            report_lines.append(f"  Type 2 (Arterial): {len(report['type_2'])} connectors")
-            for conn in report['type_2']:
-                report_lines.append(f"    -> Origin Node {conn['origin_node']}: {conn['distance_m']}m")
-        
-        if report['type_3']:
-            report_lines.append(f"  Type 3 (Collector): {len(report['type_3'])} connectors")
-            for conn in report['type_3']:
-                report_lines.append(f"    -> Origin Node {conn['origin_node']}: {conn['distance_m']}m")
-        
-        if report['type_4_plus']:
-            report_lines.append(f"  Type 4+ (Local): {len(report['type_4_plus'])} connectors")
-            for conn in report['type_4_plus']:
-                report_lines.append(f"    -> Origin Node {conn['origin_node']} (Type {conn['link_type']}): {conn['distance_m']}m")
+        if zone_id in zone_blocks.index:
+            report_lines.append(zone_blocks[zone_id])
     
     report_lines.append("")
     report_lines.append("="*80)
@@ -486,7 +634,7 @@ def enhance_connectors(search_radius=1000, accessibility_threshold=0.10,
     print("COMPLETION SUMMARY")
     print("="*80)
     print(f"Problematic zones: {len(problematic_zones)}")
-    print(f"New connectors: {len(new_connectors)}")
+    print(f"New connectors: {n_new}")
     print(f"Output file: link_enhanced.csv")
     print(f"Report file: connector_enhancement_report.txt")
     print("="*80)
@@ -494,11 +642,12 @@ def enhance_connectors(search_radius=1000, accessibility_threshold=0.10,
     # Create report dictionary
     report_dict = {
         'problematic_zones': len(problematic_zones),
-        'new_connectors': len(new_connectors),
+        'new_connectors': n_new,
         'total_links': len(final_link_df),
         'zone_details': zone_connector_report,
         'output_file': output_file,
-        'report_file': report_file
+        'report_file': report_file,
+        'spatial_index': spatial_index
     }
     
     return final_link_df, report_dict